@@ -9,6 +9,6 @@ setup(
         "packaging",
     ],
     extras_require={
-        "dev": ["pre-commit", "pytest", "flake8", "flake8-docstrings", "pytest-cov"],
+        "dev": ["pre-commit", "pytest", "flake8", "flake8-docstrings", "pytest-cov", "pytest-xdist", "orjson"],
     },
 )
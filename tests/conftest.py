@@ -1,13 +1,15 @@
 # flake8: noqa D*
+import copy
 import importlib
 import json
 import os
 import re
-from dataclasses import asdict
+from dataclasses import fields
 from importlib import reload
+from itertools import zip_longest
 from pathlib import Path
 from types import ModuleType
-from typing import Any, Callable, cast, Dict, Optional, Type, Union
+from typing import Any, Callable, cast, Dict, Iterator, Optional, Set, Type, Union
 
 import click
 import pytest
@@ -21,29 +23,101 @@ from rich_click.rich_group import RichGroup
 from rich_click.rich_help_configuration import OptionHighlighter, RichHelpConfiguration
 
 
-@pytest.fixture
+try:
+    import orjson
+
+    def load_obj(s: str) -> Any:
+        return orjson.loads(s)
+
+    def dump_obj(obj: Any) -> str:
+        # non-str keys are stringified like the stdlib `json` fallback does
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()
+
+except ImportError:
+
+    def load_obj(s: str) -> Any:  # type: ignore[misc]
+        return json.loads(s)
+
+    def dump_obj(obj: Any) -> str:  # type: ignore[misc]
+        return json.dumps(obj, indent=2)
+
+
+UPDATE_EXPECTATIONS = bool(os.getenv("UPDATE_EXPECTATIONS"))
+CLICK_MAJOR_VERSION = int(click.__version__.split(".", 1)[0])
+EXPECTATIONS_DIR = Path(__file__).parent / "expectations"
+
+
+@pytest.fixture(scope="session")
 def root_dir():
     return Path(__file__).parent
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def fixtures_dir():
     return Path(__file__).parent / "fixtures"
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def tmpdir(root_dir: Path):
     return root_dir / "tmp"
 
 
-@pytest.fixture
-def expectations_dir(root_dir: Path):
-    return root_dir / "expectations"
+_tmpdir_ready = False
 
 
-@pytest.fixture
+def ensure_tmpdir(tmpdir: Path) -> None:
+    """Create the tmp directory for failed results, at most once per session."""
+    global _tmpdir_ready
+    if not _tmpdir_ready:
+        tmpdir.mkdir(parents=True, exist_ok=True)
+        _tmpdir_ready = True
+
+
+@pytest.fixture(scope="session")
+def expectations_dir():
+    return EXPECTATIONS_DIR
+
+
+# expectations for the installed click version, keyed by file name.
+# outputs are stored normalized, see `pytest_configure`
+EXPECTED_STR: Dict[str, str] = {}
+EXPECTED_CFG: Dict[str, Any] = {}
+
+
+def pytest_configure(config: pytest.Config):
+    """Load all expectations into memory once, at the start of the session."""
+    if UPDATE_EXPECTATIONS:
+        return
+    suffix = f"-click{CLICK_MAJOR_VERSION}"
+    with os.scandir(EXPECTATIONS_DIR) as entries:
+        for entry in entries:
+            if entry.name.endswith(f"{suffix}.out"):
+                EXPECTED_STR[entry.name] = normalize_lines(Path(entry.path).read_text())
+            elif entry.name.endswith(f"{suffix}.config.json"):
+                EXPECTED_CFG[entry.name] = load_obj(Path(entry.path).read_text())
+
+
+@pytest.fixture(scope="session")
 def click_major_version() -> int:
-    return int(click.__version__.split(".")[0])
+    return CLICK_MAJOR_VERSION
+
+
+def iter_lines(s: str) -> Iterator[str]:
+    """Yield each line stripped, skipping blank lines."""
+    for line in s.splitlines():
+        stripped = line.strip()
+        if stripped:
+            yield stripped
+
+
+def normalize_lines(s: str) -> str:
+    """Strip each line and drop blank lines."""
+    return "\n".join(iter_lines(s))
+
+
+def lines_match(actual: str, expected: str) -> bool:
+    """Compare the normalized lines of two strings, stopping at the first difference."""
+    return all(a == b for a, b in zip_longest(iter_lines(actual), iter_lines(expected)))
 
 
 class AssertStr:
@@ -67,13 +141,17 @@ def assert_str(request: pytest.FixtureRequest, tmpdir: Path):
                 expected = ""
         else:
             expected = expectation
-        normalized_expected = "\n".join([line.strip() for line in expected.strip().splitlines() if line.strip()])
-        normalized_actual = "\n".join([line.strip() for line in actual.strip().splitlines() if line.strip()])
+        if lines_match(actual, expected):
+            return
+
+        # only materialize the normalized strings for a readable diff
+        normalized_expected = normalize_lines(expected)
+        normalized_actual = normalize_lines(actual)
 
         try:
             assert normalized_expected == normalized_actual
         except Exception:
-            tmpdir.mkdir(parents=True, exist_ok=True)
+            ensure_tmpdir(tmpdir)
             tmppath = tmpdir / f"{request.node.name}.out"
             tmppath.write_text(actual.strip())
             raise
@@ -94,12 +172,6 @@ class AssertDicts(Protocol):
 
 @pytest.fixture
 def assert_dicts(request: pytest.FixtureRequest, tmpdir: Path):
-    def load_obj(s: str) -> Any:
-        return json.loads(s)
-
-    def dump_obj(obj: Any) -> str:
-        return json.dumps(obj, indent=4)
-
     def roundtrip(obj):
         return load_obj(dump_obj(obj))
 
@@ -112,6 +184,14 @@ def assert_dicts(request: pytest.FixtureRequest, tmpdir: Path):
         else:
             expected = expectation
 
+        # `config_to_dict` results hold json data types already,
+        # in which case the roundtrip below can be skipped
+        try:
+            if actual == expected:
+                return
+        except Exception:
+            pass
+
         # need to perform a roundtrip to convert to
         # supported json data types (i.e. tuple -> list, datetime -> str, etc...)
         actual = roundtrip(actual)
@@ -119,7 +199,7 @@ def assert_dicts(request: pytest.FixtureRequest, tmpdir: Path):
         try:
             assert actual == expected
         except Exception:
-            tmpdir.mkdir(parents=True, exist_ok=True)
+            ensure_tmpdir(tmpdir)
             tmppath = tmpdir / f"{request.node.name}.config.json"
             with tmppath.open("w") as stream:
                 stream.write(dump_obj(actual))
@@ -128,13 +208,34 @@ def assert_dicts(request: pytest.FixtureRequest, tmpdir: Path):
     return assertion
 
 
+# module-level state that the filter below would otherwise skip,
+# i.e. private attributes and callable settings such as the highlighter
+_RICH_CLICK_RESET_ATTRS = ("_formatter", "highlighter")
+
+
+@pytest.fixture(scope="session")
+def rich_click_defaults() -> Dict[str, Any]:
+    """Snapshot of the module-level configuration of `rich_click` at session start."""
+    return copy.deepcopy(
+        {
+            k: v
+            for k, v in vars(rc).items()
+            if k in _RICH_CLICK_RESET_ATTRS
+            or (not k.startswith("_") and not callable(v) and not isinstance(v, ModuleType))
+        }
+    )
+
+
 @pytest.fixture(autouse=True)
-def initialize_rich_click():
+def initialize_rich_click(request: pytest.FixtureRequest, rich_click_defaults: Dict[str, Any]):
     """Initialize `rich_click` module."""
-    # to isolate module-level configuration we
-    # must reload the rich_click module between
-    # each test
-    reload(rc)
+    # to isolate module-level configuration we restore the
+    # module-level settings between each test. Tests marked
+    # with `reload_rich_click` get a full module reload instead.
+    if request.node.get_closest_marker("reload_rich_click"):
+        reload(rc)
+    else:
+        vars(rc).update(copy.deepcopy(rich_click_defaults))
     # default config settings from https://github.com/Textualize/rich/blob/master/tests/render.py
     rc.MAX_WIDTH = 100
 
@@ -158,6 +259,7 @@ class LoadCommandModule(Protocol):
 
 
 re_link_ids = re.compile(r"id=[\d.\-]*?;.*?\x1b")
+_link_ids_sub = re_link_ids.sub
 
 
 def replace_link_ids(render: str) -> str:
@@ -166,47 +268,83 @@ def replace_link_ids(render: str) -> str:
 
     From: https://github.com/Textualize/rich/blob/master/tests/render.py
     """
-    return re_link_ids.sub("id=0;foo\x1b", render)
+    if "id=" not in render:
+        return render
+    return _link_ids_sub("id=0;foo\x1b", render)
 
 
-@pytest.fixture
+_loaded_modules: Dict[str, ModuleType] = {}
+_modules_seen_this_test: Set[str] = set()
+
+
+@pytest.fixture(autouse=True)
+def _reset_modules_seen_this_test():
+    _modules_seen_this_test.clear()
+
+
+# fixture modules may set `_RC_TEST_PURE = True` to declare that they have
+# no module-level side effects, in which case `load_command` reuses their
+# cli across tests instead of reloading the module
+@pytest.fixture(scope="session")
 def load_command():
     def load(namespace: str):
         # set fixed terminal width for all commands
         if namespace:
-            # reload the cli module to reset state
-            # for multiple tests of the same cli command
-            module = importlib.import_module(namespace)
-            reload(module)
+            module = _loaded_modules.get(namespace)
+            if module is None:
+                module = importlib.import_module(namespace)
+                _loaded_modules[namespace] = module
+            elif namespace not in _modules_seen_this_test and not getattr(module, "_RC_TEST_PURE", False):
+                # reload the cli module to reset state
+                # for multiple tests of the same cli command
+                reload(module)
+            _modules_seen_this_test.add(namespace)
             return module
 
     return load
 
 
 class InvokeCli(Protocol):
-    def __call__(self, cmd: click.BaseCommand, *args: str) -> Result:
+    def __call__(self, cmd: click.BaseCommand, *args: str, **kwargs: Any) -> Result:
         """Invoke click command.
 
         Small convenience fixture to allow invoking a click Command
-        without standalone mode.
+        without standalone mode by default.
 
         Args:
             cmd: Click Command
+            kwargs: passed on to `CliRunner.invoke`, may override `standalone_mode`
         """
         ...
 
 
-@pytest.fixture
-def invoke():
-    runner = CliRunner()
+@pytest.fixture(scope="session")
+def cli_runner() -> CliRunner:
+    return CliRunner()
+
 
+@pytest.fixture
+def invoke(cli_runner: CliRunner):
     def invoke(cmd, *args, **kwargs):
-        result = runner.invoke(cmd, *args, **kwargs, standalone_mode=False)
-        return result
+        kwargs.setdefault("standalone_mode", False)
+        return cli_runner.invoke(cmd, *args, **kwargs)
 
     return invoke
 
 
+def config_to_dict(config: RichHelpConfiguration) -> Dict[str, Any]:
+    """Convert a `RichHelpConfiguration` to a dict."""
+    # a shallow walk is enough, the config holds no nested dataclasses
+    # and the dict is only ever compared or serialized as json.
+    # tuples (i.e. the table paddings) are stored as lists in json
+    config_dict: Dict[str, Any] = {}
+    for f in fields(config):
+        value = getattr(config, f.name)
+        config_dict[f.name] = list(value) if isinstance(value, tuple) else value
+    config_dict["highlighter"] = cast(OptionHighlighter, config.highlighter).highlights
+    return config_dict
+
+
 class AssertRichFormat(Protocol):
     def __call__(
         self,
@@ -250,11 +388,6 @@ def assert_rich_format(
     assert_str,
     click_major_version,
 ):
-    def config_to_dict(config: RichHelpConfiguration):
-        config_dict = asdict(config)
-        config_dict["highlighter"] = cast(OptionHighlighter, config.highlighter).highlights
-        return config_dict
-
     def assertion(
         cmd: Union[str, Union[RichCommand, RichGroup]],
         args: str,
@@ -266,14 +399,20 @@ def assert_rich_format(
         else:
             command = cmd
 
-        if rich_config:
-            command = rich_config(command)
-            help_config: Optional[RichHelpConfiguration] = command.context_settings.get("rich_help_config")
-            if help_config:
-                help_config.color_system = rc.COLOR_SYSTEM
-                help_config.max_width = rc.MAX_WIDTH
-                help_config.force_terminal = rc.FORCE_TERMINAL
-        result = invoke(command, args)
+        # `rich_config` updates the context settings in place, restore
+        # them afterwards so cached cli modules are left untouched
+        context_settings = dict(command.context_settings)
+        try:
+            if rich_config:
+                command = rich_config(command)
+                help_config: Optional[RichHelpConfiguration] = command.context_settings.get("rich_help_config")
+                if help_config:
+                    help_config.color_system = rc.COLOR_SYSTEM
+                    help_config.max_width = rc.MAX_WIDTH
+                    help_config.force_terminal = rc.FORCE_TERMINAL
+            result = invoke(command, args)
+        finally:
+            command.context_settings = context_settings
 
         assert command.formatter is not None
 
@@ -287,15 +426,18 @@ def assert_rich_format(
         else:
             actual = replace_link_ids(result.stdout)
 
-        expectation_output_path = expectations_dir / f"{request.node.name}-click{click_major_version}.out"
-        expectation_config_path = expectations_dir / f"{request.node.name}-click{click_major_version}.config.json"
-        if os.getenv("UPDATE_EXPECTATIONS"):
-            with open(expectation_output_path, "w") as stream:
-                stream.write(actual)
-        assert_str(actual, expectation_output_path)
-        if os.getenv("UPDATE_EXPECTATIONS"):
-            with open(expectation_config_path, "w") as stream:
-                stream.write(json.dumps(config_to_dict(command.formatter.config), indent=2))
-        assert_dicts(config_to_dict(command.formatter.config), expectation_config_path)
+        expectation_output_name = f"{request.node.name}-click{click_major_version}.out"
+        expectation_config_name = f"{request.node.name}-click{click_major_version}.config.json"
+        if UPDATE_EXPECTATIONS:
+            # the expectations are written from the actual results,
+            # so there is nothing left to assert against
+            (expectations_dir / expectation_output_name).write_text(actual)
+            (expectations_dir / expectation_config_name).write_text(
+                json.dumps(config_to_dict(command.formatter.config), indent=2)
+            )
+            return
+
+        assert_str(actual, EXPECTED_STR.get(expectation_output_name, ""))
+        assert_dicts(config_to_dict(command.formatter.config), EXPECTED_CFG.get(expectation_config_name, {}))
 
     return assertion
@@ -2,6 +2,8 @@ import click
 
 from rich_click import RichCommand, RichGroup
 
+_RC_TEST_PURE = True
+
 
 @click.group(cls=RichGroup)
 @click.option("--debug/--no-debug", default=False)
@@ -2,6 +2,8 @@ import rich_click as click
 
 # import click
 
+_RC_TEST_PURE = True
+
 # Example test usage:
 # GREETER_DEBUG=1 GREETER_GREET_USERNAME="test" EMAIL_ADDRESS="foo@bar.com" python examples/09_envvar.py greet
 
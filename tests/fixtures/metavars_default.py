@@ -1,5 +1,7 @@
 import rich_click as click
 
+_RC_TEST_PURE = True
+
 
 @click.command()
 @click.option("--debug", is_flag=True, help="Enable debug mode.")
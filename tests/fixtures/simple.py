@@ -1,5 +1,7 @@
 import rich_click as click
 
+_RC_TEST_PURE = True
+
 
 @click.group()
 @click.option(